@@ -1,9 +1,12 @@
-from flask import Flask, jsonify
+import signal
+import sys
+from flask import Flask
 from flask_cors import CORS
 from config import Config
 from extensions import jwt, limiter
 from models import init_db, seed_game_flags
-from routes import auth_bp, game_bp, leaderboard_bp,wade_bp
+from services import flag_index, static_json, analytics_writer
+from routes import auth_bp, game_bp, leaderboard_bp, wade_bp, admin_bp
 
 def create_app():
     """NEXUS Game v2.0 Application Factory (Team Auth)."""
@@ -20,31 +23,45 @@ def create_app():
     app.register_blueprint(game_bp, url_prefix="/nex-backend/api/game")
     app.register_blueprint(leaderboard_bp, url_prefix="/nex-backend/api/leaderboard")
     app.register_blueprint(wade_bp, url_prefix="/nex-backend/wade")
+    app.register_blueprint(admin_bp, url_prefix="/nex-backend/api/admin")
     
+    discovery = static_json({
+        "message": "NEXUS v2.0 - Team Authentication System",
+        "version": "2.0.0",
+        "status": "ONLINE",
+        "endpoints": {
+            "auth": "/nex-backend/api/auth",
+            "game": "/nex-backend/api/game",
+            "leaderboard": "/nex-backend/api/leaderboard"
+        }
+    })
+
     @app.route("/nex-backend")
     def base_route():
-        return jsonify({
-            "message": "NEXUS v2.0 - Team Authentication System",
-            "version": "2.0.0",
-            "status": "ONLINE",
-            "endpoints": {
-                "auth": "/nex-backend/api/auth",
-                "game": "/nex-backend/api/game",
-                "leaderboard": "/nex-backend/api/leaderboard"
-            }
-        })
+        return discovery.response()
         
     # Database Init
     with app.app_context():
         try:
             init_db()
             seed_game_flags()
+            flag_index.reload()
         except Exception as e:
             print(f"⚠️ WARNING: Database initialization failed: {e}")
             print("⚠️ The application will start, but database features may not work until connection is established.")
         
     return app
 
+def _shutdown(signum, frame):
+    """
+    Drain queued analytics and failure windows, then exit. `docker stop`
+    sends SIGTERM to PID 1, which Python ignores by default, so without
+    this the container is SIGKILLed and no atexit hook runs.
+    """
+    analytics_writer.stop()
+    sys.exit(0)
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _shutdown)
     app = create_app()
     app.run(debug=True, host="0.0.0.0", port=5000)
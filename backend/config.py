@@ -15,10 +15,37 @@ class Config:
     # Toggle User-Agent binding enforcement (strict blocks on mismatch)
     STRICT_UA_BINDING = os.getenv("STRICT_UA_BINDING", "false").lower() == "true"
     
+    # Password hashing (bcrypt runs on a bounded process pool)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_POOL_WORKERS = int(os.getenv("BCRYPT_POOL_WORKERS", str(min(os.cpu_count() or 2, 4))))
+    BCRYPT_QUEUE_DEPTH = int(os.getenv("BCRYPT_QUEUE_DEPTH", "32"))
+    BCRYPT_TIMEOUT_SECONDS = 10
+    
+    # Organizer endpoints (X-Admin-Key header); empty disables them
+    ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+    
+    # Per-process cache of authenticated teams (see services/team_cache.py)
+    TEAM_CACHE_TTL_SECONDS = int(os.getenv("TEAM_CACHE_TTL_SECONDS", "30"))
+    TEAM_CACHE_MAX_ENTRIES = int(os.getenv("TEAM_CACHE_MAX_ENTRIES", "4096"))
+    
     # MongoDB
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "nexus_game")
     
+    # Analytics (batched background writer)
+    ANALYTICS_QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000"))
+    ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))
+    ANALYTICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("ANALYTICS_FLUSH_INTERVAL_SECONDS", "1.0"))
+    # "0" = fire-and-forget, "1" = primary ack, "majority"
+    ANALYTICS_WRITE_CONCERN = os.getenv("ANALYTICS_WRITE_CONCERN", "1")
+    # Repeated failures (e.g. wrong flags): raw events kept per team per window
+    FAILURE_WINDOW_SECONDS = int(os.getenv("FAILURE_WINDOW_SECONDS", "300"))
+    FAILURE_RAW_PER_WINDOW = int(os.getenv("FAILURE_RAW_PER_WINDOW", "10"))
+    FAILURE_SAMPLE_CAP = 20
+    ANALYTICS_EXPORT_BATCH_SIZE = int(os.getenv("ANALYTICS_EXPORT_BATCH_SIZE", "2000"))
+    # Raw events expire after this long (0 = keep forever); hourly rollups are kept
+    ANALYTICS_RAW_TTL_SECONDS = int(os.getenv("ANALYTICS_RAW_TTL_SECONDS", str(7 * 24 * 3600)))
+    
     # Game Mechanics
     POINTS_FLAG = 100
     POINTS_ANSWER = 500  # Bonus for solving Question -> Stone
@@ -35,17 +62,59 @@ class Config:
         "hawkeye": "reality"
     }
     
+    # How often the in-memory flag index checks game_flags versions (0 = never)
+    FLAG_INDEX_CHECK_SECONDS = int(os.getenv("FLAG_INDEX_CHECK_SECONDS", "30"))
+    
     # Anti-Cheat Configuration
     MAX_ATTEMPTS_FLAG = 5
     MAX_ATTEMPTS_QUESTION = 3
     COOLDOWN_MINUTES = 10
+    # "memory" (single worker) or "mongo" (shared by all workers)
+    ATTEMPT_TRACKER_BACKEND = os.getenv("ATTEMPT_TRACKER_BACKEND", "memory")
+    ATTEMPT_TRACKER_MAX_KEYS = 50000
     
     # Rate Limiting
     RATELIMIT_DEFAULT = "100 per hour"
     RATELIMIT_STORAGE_URI = "memory://"
 
+    # Leaderboard
+    LEADERBOARD_SIZE = 20
+    # Rebuilds kept for ?since=<version> delta queries
+    LEADERBOARD_DELTA_HISTORY = 256
+    LEADERBOARD_STREAM_MAX_CLIENTS = int(os.getenv("LEADERBOARD_STREAM_MAX_CLIENTS", "200"))
+    LEADERBOARD_STREAM_HEARTBEAT_SECONDS = 15
+    LEADERBOARD_STATS_TTL_SECONDS = int(os.getenv("LEADERBOARD_STATS_TTL_SECONDS", "10"))
+    # Score history bucket width; must divide a day evenly
+    SCORE_HISTORY_BUCKET_MINUTES = 60
+    # Resync the in-process rank index with MongoDB (0 = never)
+    RANK_INDEX_REFRESH_SECONDS = int(os.getenv("RANK_INDEX_REFRESH_SECONDS", "300"))
+
     # OSINT codes required per Avenger to unlock question after flag
     OSINT_CODES = {
         "hulk": ["BANNER247", "GW-247"],
         # Extend for other avengers if desired
     }
+
+    # Wade vault (SQLite): "immutable" reads the file through a read-only
+    # URI, "memory" copies it into RAM at startup
+    VAULT_DB_PATH = os.getenv("VAULT_DB_PATH", "vault.db")
+    VAULT_DB_MODE = os.getenv("VAULT_DB_MODE", "immutable")
+    VAULT_DB_POOL_SIZE = int(os.getenv("VAULT_DB_POOL_SIZE", "8"))
+    VAULT_DB_MMAP_BYTES = int(os.getenv("VAULT_DB_MMAP_BYTES", str(8 * 1024 * 1024)))
+    VAULT_DB_CACHE_KIB = int(os.getenv("VAULT_DB_CACHE_KIB", "2048"))
+    # Journal mode applied to the file at startup (e.g. "WAL"); empty leaves it as is
+    VAULT_DB_JOURNAL_MODE = os.getenv("VAULT_DB_JOURNAL_MODE", "")
+    # Per-query execution budget for the (intentionally injectable) vault search
+    VAULT_QUERY_MAX_STEPS = int(os.getenv("VAULT_QUERY_MAX_STEPS", "2000000"))
+    VAULT_QUERY_MAX_SECONDS = float(os.getenv("VAULT_QUERY_MAX_SECONDS", "0.5"))
+    VAULT_QUERY_MAX_ROWS = int(os.getenv("VAULT_QUERY_MAX_ROWS", "200"))
+    VAULT_QUERY_MAX_BYTES = int(os.getenv("VAULT_QUERY_MAX_BYTES", str(64 * 1024)))
+    # Per-team in-memory copies of the vault
+    VAULT_SANDBOX_MAX_COUNT = int(os.getenv("VAULT_SANDBOX_MAX_COUNT", "500"))
+    VAULT_SANDBOX_MAX_BYTES = int(os.getenv("VAULT_SANDBOX_MAX_BYTES", str(64 * 1024 * 1024)))
+    VAULT_SANDBOX_IDLE_SECONDS = int(os.getenv("VAULT_SANDBOX_IDLE_SECONDS", "900"))
+
+    # Multi-stage challenge definitions (tracks, validators, final flags)
+    CHALLENGES_FILE = os.getenv(
+        "CHALLENGES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "challenges.json")
+    )
@@ -0,0 +1,48 @@
+"""
+NEXUS Game - Analytics Export Script
+
+Stream the analytics collection to gzip-compressed NDJSON for post-event
+analysis, without running mongoexport by hand.
+
+    python export_analytics.py -o analytics.ndjson.gz
+    python export_analytics.py --team Avengers --type FLAG_FAIL --from 2026-01-01T00:00:00Z
+"""
+
+import argparse
+import sys
+from services import analytics_query, iter_analytics_ndjson, gzip_chunks, parse_iso_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Export NEXUS analytics as NDJSON.")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--team", help="Only this team")
+    parser.add_argument("--type", action="append", default=[], help="Activity type (repeatable)")
+    parser.add_argument("--from", dest="since", help="ISO-8601 start (inclusive)")
+    parser.add_argument("--to", dest="until", help="ISO-8601 end (exclusive)")
+    parser.add_argument("--batch-size", type=int, help="MongoDB cursor batch size")
+    parser.add_argument("--no-gzip", action="store_true", help="Write plain NDJSON")
+    args = parser.parse_args()
+    
+    query = analytics_query(
+        args.team,
+        [t.upper() for t in args.type],
+        parse_iso_time(args.since),
+        parse_iso_time(args.until)
+    )
+    chunks = iter_analytics_ndjson(query, batch_size=args.batch_size)
+    if not args.no_gzip:
+        chunks = gzip_chunks(chunks)
+    
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    
+    if args.output:
+        print(f"✅ Analytics exported to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,2 @@
 # NEXUS Middleware package
-from middleware.auth import strong_auth_required
+from middleware.auth import strong_auth_required, admin_required
@@ -1,7 +1,8 @@
+import hmac
 from functools import wraps
 from flask import request, jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
-from models import teams_collection
+from services import get_team
 from datetime import datetime, timedelta
 from config import Config
 
@@ -46,8 +47,8 @@ def strong_auth_required(f):
                     # Soft warning: attach a hint in request context
                     request.ua_mismatch = True
 
-            # 5. Verify Team Still Exists (Security)
-            team = teams_collection.find_one({"team_name": team_name})
+            # 5. Verify Team Still Exists (Security), via the team cache
+            team = get_team(team_name)
             if not team:
                 return jsonify({"error": "Team not found or banned"}), 401
                 
@@ -60,3 +61,23 @@ def strong_auth_required(f):
         return f(*args, **kwargs)
         
     return decorated_function
+
+
+def admin_required(f):
+    """
+    Organizer Authentication Decorator
+    - Requires the X-Admin-Key header to match Config.ADMIN_API_KEY
+    - Admin endpoints are disabled entirely while no key is configured
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not Config.ADMIN_API_KEY:
+            return jsonify({"error": "Admin API disabled"}), 403
+        
+        provided = request.headers.get("X-Admin-Key", "")
+        if not hmac.compare_digest(provided.encode("utf-8"), Config.ADMIN_API_KEY.encode("utf-8")):
+            return jsonify({"error": "Admin authentication required"}), 401
+            
+        return f(*args, **kwargs)
+        
+    return decorated_function
@@ -4,6 +4,12 @@ from models.database import (
     teams_collection,
     game_flags_collection,
     analytics_collection,
+    score_history_collection,
+    analytics_hourly_collection,
+    activity_counters_collection,
+    failure_windows_collection,
+    attempts_collection,
     init_db,
     seed_game_flags
 )
+from models.ranking import RANK_SORT, RANK_FIELDS, rank_key, rank_key_filter
@@ -1,6 +1,7 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from config import Config
 from datetime import datetime
+from models.ranking import RANK_SORT
 
 client = MongoClient(Config.MONGO_URI)
 db = client[Config.MONGO_DB_NAME]
@@ -9,25 +10,142 @@ db = client[Config.MONGO_DB_NAME]
 teams_collection = db["teams"]
 game_flags_collection = db["game_flags"]
 analytics_collection = db["analytics"]
+score_history_collection = db["score_history"]
+analytics_hourly_collection = db["analytics_hourly"]
+activity_counters_collection = db["activity_counters"]
+failure_windows_collection = db["failure_windows"]
+attempts_collection = db["attempts"]
 
 def init_db():
     """Initialize database indexes for NEXUS game."""
     
     # Teams collection indexes
     teams_collection.create_index("team_name", unique=True)
-    teams_collection.create_index("score")  # For leaderboard
+    teams_collection.create_index(RANK_SORT, name="leaderboard_rank")  # For leaderboard
+    backfill_rank_counters()
     
     # Game flags collection indexes
     game_flags_collection.create_index("avenger", unique=True)
     game_flags_collection.create_index("flag_hash", unique=True)
     
-    # Analytics collection indexes
+    # Score history: one bucket document per team per time window
+    score_history_collection.create_index([("team_name", 1), ("bucket_start", 1)], unique=True)
+    
+    # Shared attempt tracker: documents expire once their cooldown window passes
+    attempts_collection.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Hourly analytics rollups (kept after raw events expire)
+    analytics_hourly_collection.create_index(
+        [("team_name", 1), ("activity_type", 1), ("hour", 1)], unique=True
+    )
+    analytics_hourly_collection.create_index("hour")
+    
+    # Analytics collection indexes; raw events are rolled up before the
+    # TTL can expire any of them
     analytics_collection.create_index("team_name")
-    analytics_collection.create_index("timestamp")
+    backfill_analytics_hourly()
+    ensure_analytics_ttl(Config.ANALYTICS_RAW_TTL_SECONDS)
     analytics_collection.create_index([("team_name", 1), ("activity_type", 1)])
+    analytics_collection.create_index([("team_name", 1), ("timestamp", -1), ("_id", -1)])  # Log pagination
+    analytics_collection.create_index(
+        [("team_name", 1), ("activity_type", 1), ("timestamp", -1), ("_id", -1)]
+    )  # Log pagination filtered by type
+    
+    # Per-team activity counters (exact over the whole event)
+    activity_counters_collection.create_index("team_name", unique=True)
+    backfill_activity_counters()
+    
+    # Coalesced failure counters: one document per team per type per window
+    failure_windows_collection.create_index(
+        [("team_name", 1), ("activity_type", 1), ("window_start", 1)], unique=True
+    )
     
     print("✅ NEXUS database indexes initialized.")
 
+def ensure_analytics_ttl(seconds):
+    """
+    Make the analytics timestamp index expire raw events after `seconds`
+    (0 keeps them forever), converting an existing index in place.
+    """
+    info = analytics_collection.index_information().get("timestamp_1")
+    if info is not None and info.get("expireAfterSeconds") != (seconds or None):
+        if seconds and "expireAfterSeconds" in info:
+            db.command(
+                "collMod", analytics_collection.name,
+                index={"keyPattern": {"timestamp": 1}, "expireAfterSeconds": seconds}
+            )
+            return
+        analytics_collection.drop_index("timestamp_1")
+    
+    if seconds:
+        analytics_collection.create_index("timestamp", expireAfterSeconds=seconds)
+    else:
+        analytics_collection.create_index("timestamp")
+
+def backfill_activity_counters():
+    """Seed per-team activity counters from raw analytics on first run."""
+    if activity_counters_collection.estimated_document_count():
+        return
+    
+    pipeline = [{"$group": {"_id": {"team_name": "$team_name", "type": "$activity_type"}, "count": {"$sum": 1}}}]
+    for row in analytics_collection.aggregate(pipeline):
+        activity_counters_collection.update_one(
+            {"team_name": row["_id"]["team_name"]},
+            {"$inc": {f"counts.{row['_id']['type']}": row["count"], "total": row["count"]}},
+            upsert=True
+        )
+
+def backfill_analytics_hourly():
+    """Seed hourly rollups from raw analytics logged before rollups existed."""
+    if analytics_hourly_collection.estimated_document_count():
+        return
+    
+    hour = {
+        "$dateFromParts": {
+            "year": {"$year": "$timestamp"},
+            "month": {"$month": "$timestamp"},
+            "day": {"$dayOfMonth": "$timestamp"},
+            "hour": {"$hour": "$timestamp"}
+        }
+    }
+    pipeline = [
+        {"$match": {"timestamp": {"$type": "date"}}},
+        {"$group": {
+            "_id": {"team_name": "$team_name", "type": "$activity_type", "hour": hour},
+            "count": {"$sum": 1}
+        }}
+    ]
+    ops = []
+    for row in analytics_collection.aggregate(pipeline, allowDiskUse=True):
+        key = row["_id"]
+        ops.append(UpdateOne(
+            {"team_name": key["team_name"], "activity_type": key["type"], "hour": key["hour"]},
+            {"$inc": {"count": row["count"]}},
+            upsert=True
+        ))
+        if len(ops) >= 1000:
+            analytics_hourly_collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        analytics_hourly_collection.bulk_write(ops, ordered=False)
+
+def backfill_rank_counters():
+    """Populate denormalized ranking counters on teams created before they existed."""
+    for team in teams_collection.find(
+        {"stones_count": {"$exists": False}},
+        {"collected_stones": 1, "solved_flags": 1, "completed_avengers": 1}
+    ):
+        teams_collection.update_one(
+            {"_id": team["_id"]},
+            {
+                "$set": {
+                    "stones_count": len(team.get("collected_stones", [])),
+                    "flags_count": len(team.get("solved_flags", [])),
+                    "completed_count": len(team.get("completed_avengers", []))
+                }
+            }
+        )
+
 def seed_game_flags():
     """Seed game with Flags AND Questions (Part of 2-Stage Flow)."""
     import hashlib
@@ -93,7 +211,9 @@ def seed_game_flags():
                     "points_flag": data['points'],
                     "points_stone": Config.POINTS_ANSWER,
                     "created_at": datetime.utcnow()
-                }
+                },
+                # Tells running flag indexes to reload
+                "$inc": {"version": 1}
             },
             upsert=True
         )
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+# Leaderboard ranking order shared by every ranked query.
+#
+# 1. Primary: Total Score (descending)
+# 2. Tiebreaker 1: Number of stones collected (descending)
+# 3. Tiebreaker 2: Number of flags solved (descending)
+# 4. Tiebreaker 3: Team creation timestamp (earliest wins)
+# 5. Team name, so the order is total and stable
+RANK_SORT = [
+    ("score", -1),
+    ("stones_count", -1),
+    ("flags_count", -1),
+    ("created_at", 1),
+    ("team_name", 1),
+]
+
+RANK_FIELDS = [field for field, _ in RANK_SORT]
+
+# Value type of each ranking field, for checking client-supplied keys
+RANK_FIELD_TYPES = {
+    "score": (int, float),
+    "stones_count": int,
+    "flags_count": int,
+    "created_at": datetime,
+    "team_name": str,
+}
+
+
+def rank_key(values):
+    """
+    Validate a client-supplied ranking key (e.g. a decoded cursor) and return
+    just its RANK_FIELDS. Every field must be a plain value of its expected
+    type, so nothing like an operator document can reach a query.
+    Raises ValueError otherwise.
+    """
+    key = {}
+    for field in RANK_FIELDS:
+        value = values.get(field)
+        if isinstance(value, bool) or not isinstance(value, RANK_FIELD_TYPES[field]):
+            raise ValueError("Invalid cursor")
+        key[field] = value
+    return key
+
+
+def rank_key_filter(key, ahead=True):
+    """
+    Build a filter matching teams strictly ahead of (or behind) `key` in
+    RANK_SORT order. `key` maps each ranking field to the reference value.
+
+    The result is an $or of equality prefixes plus one range condition,
+    which the compound leaderboard index answers as bounded range scans.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(RANK_SORT):
+        clause = {f: key.get(f) for f, _ in RANK_SORT[:i]}
+        descending = direction == -1
+        op = "$gt" if descending == ahead else "$lt"
+        clause[field] = {op: key.get(field)}
+        clauses.append(clause)
+    return {"$or": clauses}
@@ -0,0 +1,42 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify, Response
+from middleware import admin_required
+from services import flag_index, analytics_query, iter_analytics_ndjson, gzip_chunks, parse_iso_time
+
+admin_bp = Blueprint("admin", __name__)
+
+@admin_bp.route("/analytics/export", methods=["GET"])
+@admin_required
+def export_analytics():
+    """
+    Organizer Export: stream analytics events as gzip-compressed NDJSON.
+
+    Optional filters: team, activity_type (comma-separated), from, to
+    (ISO-8601 UTC). Events are streamed straight from a MongoDB cursor.
+    """
+    try:
+        since = parse_iso_time(request.args.get("from"))
+        until = parse_iso_time(request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    types = [t.strip().upper() for t in request.args.get("activity_type", "").split(",") if t.strip()]
+    query = analytics_query(request.args.get("team"), types, since, until)
+    
+    filename = f"nexus-analytics-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson.gz"
+    return Response(
+        gzip_chunks(iter_analytics_ndjson(query)),
+        mimetype="application/gzip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@admin_bp.route("/flags/reload", methods=["POST"])
+@admin_required
+def reload_flags():
+    """Organizer: rebuild the in-memory flag index from game_flags now."""
+    snapshot = flag_index.reload()
+    return jsonify({
+        "message": "Flag index reloaded",
+        "challenges": len(snapshot.by_avenger)
+    }), 200
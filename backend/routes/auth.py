@@ -1,20 +1,17 @@
-import bcrypt
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
-from models import teams_collection, analytics_collection
+from models import teams_collection
 from config import Config
 from extensions import limiter
+from services import on_team_created, log_activity, PasswordPoolBusy, hash_password, check_password, needs_rehash
 
 auth_bp = Blueprint("auth", __name__)
 
-def log_activity(team_name, activity_type, details=None):
-    analytics_collection.insert_one({
-        "team_name": team_name,
-        "activity_type": activity_type,
-        "timestamp": datetime.utcnow(),
-        "details": details or {}
-    })
+def _busy():
+    resp = jsonify({"error": "Server busy, please retry shortly"})
+    resp.headers["Retry-After"] = "2"
+    return resp, 503
 
 @auth_bp.route("/signup", methods=["POST"])
 @limiter.limit("5 per minute")
@@ -34,19 +31,27 @@ def signup():
         return jsonify({"error": "Team Name already exists"}), 409
         
     # Hash password
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    try:
+        password_hash = hash_password(password)
+    except PasswordPoolBusy:
+        return _busy()
     
     # Create Team
-    teams_collection.insert_one({
+    team = {
         "team_name": team_name,
         "password_hash": password_hash,
         "score": 0,
+        "stones_count": 0,
+        "flags_count": 0,
+        "completed_count": 0,
         "created_at": datetime.utcnow(),
         "solved_flags": [],
         "collected_stones": [],
         "completed_avengers": []
-    })
+    }
+    teams_collection.insert_one(team)
     
+    on_team_created(team)
     log_activity(team_name, "SIGNUP")
     
     return jsonify({"message": "Team Registered Successfully"}), 201
@@ -61,9 +66,25 @@ def login():
     current_ua = request.headers.get("User-Agent", "")
     
     team = teams_collection.find_one({"team_name": team_name})
-    
-    if not team or not bcrypt.checkpw(password.encode('utf-8'), team['password_hash']):
+    if not team:
         return jsonify({"error": "Invalid Credentials"}), 401
+    
+    try:
+        if not check_password(password, team['password_hash']):
+            return jsonify({"error": "Invalid Credentials"}), 401
+    except PasswordPoolBusy:
+        return _busy()
+        
+    # Transparently upgrade hashes made with an older cost factor; best
+    # effort, so a busy pool never fails an otherwise valid login
+    if needs_rehash(team['password_hash']):
+        try:
+            teams_collection.update_one(
+                {"team_name": team_name},
+                {"$set": {"password_hash": hash_password(password)}}
+            )
+        except PasswordPoolBusy:
+            pass
         
     # Create JWT with strict 3-hour expiry AND UA Binding
     now_timestamp = datetime.utcnow().timestamp()
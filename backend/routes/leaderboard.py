@@ -1,80 +1,188 @@
-from flask import Blueprint, jsonify, request
-from models import teams_collection, analytics_collection, game_flags_collection
+from flask import Blueprint, jsonify, request, Response
+from models import (
+    teams_collection, analytics_collection, analytics_hourly_collection,
+    activity_counters_collection, RANK_SORT, RANK_FIELDS, rank_key, rank_key_filter
+)
+from config import Config
 from middleware import strong_auth_required
+from services import (
+    leaderboard_cache, rank_index, stats_cache, compute_global_stats,
+    encode_cursor, decode_cursor, page_limit, parse_iso_time, get_score_history,
+    version_etag, version_tag, parse_version_tag, not_modified, with_etag
+)
 
+from bson import ObjectId
 from datetime import datetime
+import hashlib
+import json
+import threading
  
 leaderboard_bp = Blueprint("leaderboard", __name__)
 
+# Each open stream holds a worker thread, so cap them
+_stream_slots = threading.BoundedSemaphore(Config.LEADERBOARD_STREAM_MAX_CLIENTS)
+
 @leaderboard_bp.route("/", methods=["GET"])
 def get_leaderboard():
     """
     Public Leaderboard: Top Teams by Score with Ranking Logic.
-    
-    Ranking Criteria:
-    1. Primary: Total Score (descending)
-    2. Tiebreaker 1: Number of stones collected (descending)
-    3. Tiebreaker 2: Number of flags solved (descending)
-    4. Tiebreaker 3: Team creation timestamp (earliest wins)
-    """
-    # Fetch all teams with relevant fields
-    teams = list(teams_collection.find(
-        {}, 
-        {
-            "team_name": 1, 
-            "score": 1, 
-            "collected_stones": 1, 
-            "solved_flags": 1,
-            "completed_avengers": 1,
-            "created_at": 1,
-            "_id": 0
-        }
-    ))
-    
-    # Calculate additional statistics for each team
-    for team in teams:
-        team["stones_count"] = len(team.get("collected_stones", []))
-        team["flags_count"] = len(team.get("solved_flags", []))
-        team["completed_count"] = len(team.get("completed_avengers", []))
-        
-        # Calculate progress percentage (6 avengers total)
-        total_avengers = 6
-        team["progress_percentage"] = round((team["completed_count"] / total_avengers) * 100, 1)
-    
-    # Sort teams with proper tiebreaker logic
-    sorted_teams = sorted(
-        teams,
-        key=lambda x: (
-            -x.get("score", 0),                    # Primary: Score (descending)
-            -x["stones_count"],                     # Tiebreaker 1: Stones (descending)
-            -x["flags_count"],                      # Tiebreaker 2: Flags (descending)
-            x.get("created_at", datetime.max)       # Tiebreaker 3: Created time (ascending)
-        )
-    )
-    
-    # Add rank to each team
-    for idx, team in enumerate(sorted_teams, start=1):
-        team["rank"] = idx
-    
-    # Limit to top 20 teams
-    top_teams = sorted_teams[:20]
-    
-    # Remove internal fields from response
-    for team in top_teams:
+
+    Served from the materialized leaderboard, which is rebuilt and
+    re-versioned only when a score-changing write happens.
+    """
+    cached = not_modified(version_etag("lb", leaderboard_cache.version))
+    if cached:
+        return cached
+
+    version, body = leaderboard_cache.snapshot()
+    response = Response(body, status=200, mimetype="application/json")
+    return with_etag(response, version_etag("lb", version))
+
+
+@leaderboard_bp.route("/all", methods=["GET"])
+def get_full_leaderboard():
+    """
+    Public Full Leaderboard: every team in ranking order, keyset-paginated.
+
+    `?cursor=` is the opaque `next_cursor` from the previous page. Each page
+    is one range read on the leaderboard index, and a cursor stays valid
+    while scores change because it encodes a position in the ranking order
+    rather than an offset.
+    """
+    limit = page_limit(request.args.get("limit", type=int))
+    cursor = request.args.get("cursor")
+
+    query = {}
+    if cursor:
+        try:
+            query = rank_key_filter(rank_key(decode_cursor(cursor)), ahead=False)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    projection = {field: 1 for field in RANK_FIELDS}
+    projection.update({"completed_count": 1, "_id": 0})
+    teams = list(teams_collection.find(query, projection).sort(RANK_SORT).limit(limit + 1))
+
+    has_more = len(teams) > limit
+    teams = teams[:limit]
+    next_cursor = encode_cursor({field: teams[-1].get(field) for field in RANK_FIELDS}) if has_more else None
+
+    first_rank = rank_index.rank(teams[0]["team_name"]) if teams else None
+    for offset, team in enumerate(teams):
+        team["rank"] = first_rank + offset if first_rank else None
         team.pop("created_at", None)
-    
+
     return jsonify({
-        "leaderboard": top_teams,
-        "total_teams": len(teams),
-        "timestamp": datetime.utcnow().isoformat()
+        "leaderboard": teams,
+        "next_cursor": next_cursor,
+        "total_teams": rank_index.total()
     }), 200
 
 
+@leaderboard_bp.route("/history", methods=["GET"])
+def get_score_progression():
+    """
+    Public Score Progression: score-over-time curves for the top teams.
+
+    `?top=` picks how many teams (default 10, max 20) and `?team=` adds one
+    more, e.g. the viewer's own team.
+    """
+    top = min(max(request.args.get("top", 10, type=int), 1), 20)
+    team_names = [row["team_name"] for row in rank_index.top(top)]
+    extra = request.args.get("team")
+    if extra and extra not in team_names and rank_index.rank(extra):
+        team_names.append(extra)
+
+    return jsonify({
+        "series": [
+            {
+                "team_name": name,
+                "rank": rank_index.rank(name),
+                "points": get_score_history(name)
+            }
+            for name in team_names
+        ],
+        "bucket_minutes": Config.SCORE_HISTORY_BUCKET_MINUTES
+    }), 200
+
+
+@leaderboard_bp.route("/changes", methods=["GET"])
+def get_leaderboard_changes():
+    """
+    Polling fallback for the stream: rows whose rank or score changed since
+    `?since=<version>`. Falls back to the full leaderboard when the version
+    is too old, missing, or was issued before a restart.
+    """
+    since = parse_version_tag(request.args.get("since"))
+    deltas = leaderboard_cache.deltas_since(since) if since is not None else None
+    if deltas is None:
+        return Response(leaderboard_cache.get(), status=200, mimetype="application/json")
+    return jsonify(deltas[1]), 200
+
+
+@leaderboard_bp.route("/stream", methods=["GET"])
+def stream_leaderboard():
+    """
+    Server-Sent Events leaderboard: one `snapshot` event, then a `delta`
+    event per score-changing write with only the rows that moved.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if request.method == "HEAD":
+        # No body will be read, so don't take a stream slot for it
+        return Response(mimetype="text/event-stream", headers=headers)
+
+    if not _stream_slots.acquire(blocking=False):
+        return jsonify({"error": "Too many open leaderboard streams, poll /changes instead"}), 503
+
+    # Ids from another process (e.g. before a deploy) fall back to a snapshot
+    last_event_id = parse_version_tag(request.headers.get("Last-Event-ID"))
+
+    def generate():
+        version = last_event_id
+        deltas = leaderboard_cache.deltas_since(version) if version is not None else None
+        if deltas is None:
+            version, body = leaderboard_cache.snapshot()
+            yield _sse("snapshot", version, body.decode("utf-8"))
+        elif deltas[1]["changed"] or deltas[1]["removed"]:
+            version, payload = deltas
+            yield _sse("delta", version, json.dumps(payload, separators=(",", ":")))
+
+        while True:
+            current = leaderboard_cache.wait_for_change(version, Config.LEADERBOARD_STREAM_HEARTBEAT_SECONDS)
+            if current == version:
+                yield ": keepalive\n\n"
+                continue
+            deltas = leaderboard_cache.deltas_since(version)
+            if deltas is None:
+                version, body = leaderboard_cache.snapshot()
+                yield _sse("snapshot", version, body.decode("utf-8"))
+            else:
+                version, payload = deltas
+                yield _sse("delta", version, json.dumps(payload, separators=(",", ":")))
+
+    response = Response(generate(), mimetype="text/event-stream", headers=headers)
+    # Runs even when the generator never starts (e.g. early disconnect)
+    response.call_on_close(_stream_slots.release)
+    return response
+
+
+def _sse(event, version, data):
+    return f"event: {event}\nid: {version_tag(version)}\ndata: {data}\n\n"
+
+
 @leaderboard_bp.route("/team/<team_name>", methods=["GET"])
 def get_team_stats(team_name):
     """
     Public Team Statistics: Get detailed stats for a specific team.
     """
+    # Rank depends on every team, so the global score version scopes the ETag.
+    # Names are free-form, so only a digest of one is safe in the header
+    name_digest = hashlib.sha1(team_name.encode("utf-8")).hexdigest()[:16]
+    etag = version_etag("team", leaderboard_cache.version, name_digest)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     team = teams_collection.find_one(
         {"team_name": team_name},
         {"_id": 0, "password_hash": 0}
@@ -87,36 +195,37 @@ def get_team_stats(team_name):
     stats = {
         "team_name": team["team_name"],
         "score": team.get("score", 0),
-        "stones_collected": len(team.get("collected_stones", [])),
-        "flags_solved": len(team.get("solved_flags", [])),
-        "avengers_completed": len(team.get("completed_avengers", [])),
-        "progress_percentage": round((len(team.get("completed_avengers", [])) / 6) * 100, 1),
+        "stones_collected": team.get("stones_count", 0),
+        "flags_solved": team.get("flags_count", 0),
+        "avengers_completed": team.get("completed_count", 0),
+        "progress_percentage": round((team.get("completed_count", 0) / len(Config.AVENGERS)) * 100, 1),
         "collected_stones_list": team.get("collected_stones", []),
         "solved_flags_list": team.get("solved_flags", []),
         "completed_avengers_list": team.get("completed_avengers", [])
     }
     
-    # Get team's rank
-    all_teams = list(teams_collection.find({}, {"team_name": 1, "score": 1, "collected_stones": 1, "solved_flags": 1, "created_at": 1}))
-    for t in all_teams:
-        t["stones_count"] = len(t.get("collected_stones", []))
-        t["flags_count"] = len(t.get("solved_flags", []))
+    # Rank and total come from the in-process rank index
+    stats["rank"] = rank_index.rank(team_name)
+    stats["total_teams"] = rank_index.total()
     
-    sorted_teams = sorted(
-        all_teams,
-        key=lambda x: (
-            -x.get("score", 0),
-            -x["stones_count"],
-            -x["flags_count"],
-            x.get("created_at", datetime.max)
-        )
-    )
-    
-    rank = next((idx + 1 for idx, t in enumerate(sorted_teams) if t["team_name"] == team_name), None)
-    stats["rank"] = rank
-    stats["total_teams"] = len(all_teams)
+    return with_etag(jsonify(stats), etag), 200
+
+
+@leaderboard_bp.route("/team/<team_name>/around", methods=["GET"])
+def get_team_neighbours(team_name):
+    """
+    Public Team Neighbourhood: the teams ranked just above and below a team.
+    """
+    radius = min(max(request.args.get("radius", 5, type=int), 1), 50)
+    window = rank_index.around(team_name, radius)
+    if window is None:
+        return jsonify({"error": "Team not found"}), 404
     
-    return jsonify(stats), 200
+    return jsonify({
+        "team_name": team_name,
+        "teams": window,
+        "total_teams": rank_index.total()
+    }), 200
 
 
 @leaderboard_bp.route("/activity", methods=["GET"])
@@ -124,80 +233,166 @@ def get_team_stats(team_name):
 def get_team_activity():
     """
     Private Activity Log for Logged-In Team with Enhanced Details.
+
+    The summary is exact over the whole event (per-team counters); `logs`
+    is the newest page of the raw log, continued via /activity/logs.
     """
     team_name = request.team['team_name']
+    logs, next_cursor = _activity_page(team_name, None, 100)
     
-    # Get activity logs
-    logs = list(analytics_collection.find(
-        {"team_name": team_name},
-        {"_id": 0}
-    ).sort("timestamp", -1).limit(100))
-    
-    # Format timestamps for better readability
-    for log in logs:
-        if "timestamp" in log:
-            log["timestamp"] = log["timestamp"].isoformat() if isinstance(log["timestamp"], datetime) else log["timestamp"]
+    return jsonify({
+        "team": team_name,
+        "logs": logs,
+        "next_cursor": next_cursor,
+        "summary": _activity_summary(team_name)
+    }), 200
+
+
+@leaderboard_bp.route("/activity/summary", methods=["GET"])
+@strong_auth_required
+def get_team_activity_summary():
+    """
+    Private Activity Summary: exact per-type counts from a single document.
+    """
+    team_name = request.team['team_name']
+    return jsonify({
+        "team": team_name,
+        "summary": _activity_summary(team_name)
+    }), 200
+
+
+@leaderboard_bp.route("/activity/logs", methods=["GET"])
+@strong_auth_required
+def get_team_activity_logs():
+    """
+    Private Raw Activity Log, newest first, keyset-paginated on
+    (timestamp, _id). Pass the previous page's `next_cursor` as `?cursor=`.
+
+    Filters (keep passing them with the cursor):
+    - activity_type: one type or a comma-separated list, e.g. FLAG_FAIL
+    - from / to: ISO-8601 UTC bounds on the timestamp (from inclusive)
+    """
+    team_name = request.team['team_name']
+    try:
+        cursor = _log_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        since = parse_iso_time(request.args.get("from"))
+        until = parse_iso_time(request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # Get activity summary
-    activity_summary = {
-        "total_activities": len(logs),
-        "flag_successes": len([l for l in logs if l.get("activity_type") == "FLAG_SUCCESS"]),
-        "flag_failures": len([l for l in logs if l.get("activity_type") == "FLAG_FAIL"]),
-        "stones_acquired": len([l for l in logs if l.get("activity_type") == "STONE_ACQUIRED"]),
-        "question_failures": len([l for l in logs if l.get("activity_type") == "QUESTION_FAIL"]),
-        "logins": len([l for l in logs if l.get("activity_type") == "LOGIN"])
-    }
+    types = [t.strip().upper() for t in request.args.get("activity_type", "").split(",") if t.strip()]
+    logs, next_cursor = _activity_page(
+        team_name, cursor, page_limit(request.args.get("limit", type=int)),
+        activity_types=types, since=since, until=until
+    )
     
     return jsonify({
         "team": team_name,
         "logs": logs,
-        "summary": activity_summary
+        "next_cursor": next_cursor
     }), 200
 
 
-@leaderboard_bp.route("/stats", methods=["GET"])
-def get_global_stats():
+def _log_cursor(value):
+    """Decode an activity log cursor, which must hold a timestamp and an ObjectId."""
+    cursor = decode_cursor(value)
+    if not isinstance(cursor.get("timestamp"), datetime) or not isinstance(cursor.get("_id"), ObjectId):
+        raise ValueError("Invalid cursor")
+    return cursor
+
+
+def _activity_summary(team_name):
+    doc = activity_counters_collection.find_one({"team_name": team_name}, {"_id": 0}) or {}
+    counts = doc.get("counts", {})
+    return {
+        "total_activities": doc.get("total", 0),
+        "flag_successes": counts.get("FLAG_SUCCESS", 0),
+        "flag_failures": counts.get("FLAG_FAIL", 0),
+        "stones_acquired": counts.get("STONE_ACQUIRED", 0),
+        "question_failures": counts.get("QUESTION_FAIL", 0),
+        "logins": counts.get("LOGIN", 0),
+        "by_type": counts
+    }
+
+
+def _activity_page(team_name, cursor, limit, activity_types=None, since=None, until=None):
     """
-    Global Game Statistics: Overall game progress and statistics.
+    One page of a team's raw log after `cursor`; returns (logs, next_cursor).
+
+    Every filter maps onto the (team_name[, activity_type], timestamp, _id)
+    indexes, so the page is an index-bounded range read.
     """
-    total_teams = teams_collection.count_documents({})
+    query = {"team_name": team_name}
+    if activity_types:
+        query["activity_type"] = activity_types[0] if len(activity_types) == 1 else {"$in": activity_types}
+    bounds = {}
+    if since:
+        bounds["$gte"] = since
+    if until:
+        bounds["$lt"] = until
+    if cursor:
+        # Top-level bound so every page is a range read on the index,
+        # whatever the planner does with the $or tie-break below
+        bounds["$lte"] = cursor["timestamp"]
+        query["$or"] = [
+            {"timestamp": {"$lt": cursor["timestamp"]}},
+            {"timestamp": cursor["timestamp"], "_id": {"$lt": cursor["_id"]}}
+        ]
+    if bounds:
+        query["timestamp"] = bounds
     
-    # Get teams that have collected all 6 stones
-    perfect_teams = teams_collection.count_documents({
-        "collected_stones": {"$size": 6}
-    })
+    logs = list(analytics_collection.find(query).sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1))
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    next_cursor = encode_cursor({"timestamp": logs[-1]["timestamp"], "_id": logs[-1]["_id"]}) if has_more else None
     
-    # Get average score
-    pipeline = [
-        {"$group": {"_id": None, "avg_score": {"$avg": "$score"}}}
-    ]
-    avg_result = list(teams_collection.aggregate(pipeline))
-    avg_score = round(avg_result[0]["avg_score"], 2) if avg_result else 0
+    # Format timestamps for better readability
+    for log in logs:
+        log.pop("_id", None)
+        if isinstance(log.get("timestamp"), datetime):
+            log["timestamp"] = log["timestamp"].isoformat()
     
-    # Get stone collection stats
-    stone_stats = {}
-    stones = ["power", "space", "mind", "time", "soul", "reality"]
-    for stone in stones:
-        count = teams_collection.count_documents({
-            "collected_stones": stone
-        })
-        stone_stats[stone] = count
+    return logs, next_cursor
+
+
+@leaderboard_bp.route("/activity/hourly", methods=["GET"])
+@strong_auth_required
+def get_team_activity_hourly():
+    """
+    Private hourly activity counts for the logged-in team. Unlike the raw
+    log, these rollups are kept after raw events expire.
+    """
+    team_name = request.team['team_name']
+    
+    rows = list(analytics_hourly_collection.find(
+        {"team_name": team_name},
+        {"_id": 0, "team_name": 0}
+    ).sort("hour", 1))
     
-    # Get avenger completion stats
-    avenger_stats = {}
-    avengers = ["ironman", "captainamerica", "thor", "deadpool", "hulk", "hawkeye"]
-    for avenger in avengers:
-        count = teams_collection.count_documents({
-            "completed_avengers": avenger
-        })
-        avenger_stats[avenger] = count
+    for row in rows:
+        row["hour"] = row["hour"].isoformat()
     
     return jsonify({
-        "total_teams": total_teams,
-        "perfect_teams": perfect_teams,
-        "average_score": avg_score,
-        "stone_collection_stats": stone_stats,
-        "avenger_completion_stats": avenger_stats,
-        "timestamp": datetime.utcnow().isoformat()
+        "team": team_name,
+        "hourly": rows
     }), 200
 
+
+@leaderboard_bp.route("/stats", methods=["GET"])
+def get_global_stats():
+    """
+    Global Game Statistics: Overall game progress and statistics.
+
+    Computed by one aggregation and served from a short-TTL cache that
+    score-changing writes invalidate.
+    """
+    # Read the version before computing, and cache the body under it, so a
+    # body computed before a score change is never served as a newer version
+    version = leaderboard_cache.version
+    etag = version_etag("stats", version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    body = stats_cache.get_or_set(version, compute_global_stats)
+    return with_etag(Response(body, status=200, mimetype="application/json"), etag)
@@ -1,18 +1,20 @@
-from flask import Blueprint, request, jsonify, render_template,Response
+from flask import Blueprint, request, jsonify, render_template
 from flask_cors import cross_origin
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_limiter.util import get_remote_address
 import jwt
 import sqlite3
 import os
+from config import Config
+from services import (
+    ReadOnlySQLitePool, SQLitePoolBusy, QueryBudgetExceeded, execute_limited, SQLiteSandboxes,
+    StaticPayload, static_json
+)
 # Create a Blueprint
 wade_bp = Blueprint('wade_api', __name__, template_folder='templates')
 
 JWT_SECRET = "deadpool"
-DB_PATH = "vault.db"
-
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+DB_PATH = Config.VAULT_DB_PATH
 
 # Initialize DB (Run this once or inside the blueprint setup)
 def init_db():
@@ -26,13 +28,49 @@ def init_db():
         c.execute("INSERT INTO secrets (flag) VALUES (?)", ("flag{w4d3_l0v3s_ch1m1ch4ng4s_4nd_sqli}",))
         conn.commit()
         conn.close()
+    if Config.VAULT_DB_JOURNAL_MODE:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute(f"PRAGMA journal_mode = {Config.VAULT_DB_JOURNAL_MODE}")
+        conn.close()
 
 init_db()
-@cross_origin()
-@wade_bp.route("/")
-def serve_shack():
-    # This serves the HTML page you provided
-    return Response("""
+
+# Read-only connections shared by every vault request
+vault_pool = ReadOnlySQLitePool(
+    DB_PATH,
+    mode=Config.VAULT_DB_MODE,
+    size=Config.VAULT_DB_POOL_SIZE,
+    mmap_bytes=Config.VAULT_DB_MMAP_BYTES,
+    cache_kib=Config.VAULT_DB_CACHE_KIB
+)
+
+# Each team queries its own in-memory copy, cloned from vault_pool on first use
+vault_sandboxes = SQLiteSandboxes(
+    vault_pool,
+    max_count=Config.VAULT_SANDBOX_MAX_COUNT,
+    max_bytes=Config.VAULT_SANDBOX_MAX_BYTES,
+    idle_seconds=Config.VAULT_SANDBOX_IDLE_SECONDS
+)
+
+def sandbox_key():
+    """Team from an optional NEXUS token, otherwise the client address."""
+    try:
+        verify_jwt_in_request(optional=True)
+        team_name = get_jwt_identity()
+    except Exception:
+        team_name = None
+    return f"team:{team_name}" if team_name else f"ip:{get_remote_address()}"
+
+# The sample token never changes, so it is signed once
+docs_page = static_json({
+    "endpoints": [{
+        "path": "/api/recipe",
+        "sample_token": jwt.encode({"user": "customer_bob", "role": "customer"}, JWT_SECRET, algorithm="HS256")
+    }],
+    "hint": "The JWT secret is Wade's name."
+})
+
+SHACK_HTML = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -328,15 +366,20 @@ async function fetchVault() {
 
 </body>
 </html>
-""", content_type="text/html")
+"""
+
+# Rendered and compressed once; served by content negotiation
+shack_page = StaticPayload(SHACK_HTML, "text/html")
+
+@cross_origin()
+@wade_bp.route("/")
+def serve_shack():
+    # This serves the HTML page you provided
+    return shack_page.response()
 @cross_origin()
 @wade_bp.route("/api/docs")
 def api_docs():
-    sample_token = jwt.encode({"user": "customer_bob", "role": "customer"}, JWT_SECRET, algorithm="HS256")
-    return jsonify({
-        "endpoints": [{"path": "/api/recipe", "sample_token": sample_token}],
-        "hint": "The JWT secret is Wade's name."
-    })
+    return docs_page.response()
 @cross_origin()
 @wade_bp.route("/api/recipe")
 def recipe():
@@ -359,6 +402,24 @@ def vault():
     item = request.args.get("item", "")
     # INTENTIONALLY VULNERABLE SQLI
     query = f"SELECT item, price, description FROM menu WHERE item = '{item}'"
-    conn = get_db()
-    results = conn.execute(query).fetchall()
-    return jsonify({"results": [dict(row) for row in results]})
\ No newline at end of file
+    try:
+        with vault_sandboxes.connection(sandbox_key()) as conn:
+            # Still injectable, but bounded so one payload can't pin a worker
+            results = execute_limited(
+                conn, query,
+                max_steps=Config.VAULT_QUERY_MAX_STEPS,
+                max_seconds=Config.VAULT_QUERY_MAX_SECONDS,
+                max_rows=Config.VAULT_QUERY_MAX_ROWS,
+                max_bytes=Config.VAULT_QUERY_MAX_BYTES
+            )
+    except QueryBudgetExceeded as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLitePoolBusy:
+        return jsonify({"error": "Vault is busy, try again"}), 503
+    return jsonify({"results": [dict(row) for row in results]})
+
+@cross_origin()
+@wade_bp.route("/api/vault/reset", methods=["POST"])
+def vault_reset():
+    vault_sandboxes.reset(sandbox_key())
+    return jsonify({"message": "Vault restored. Wade pretends nothing happened."})
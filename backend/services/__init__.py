@@ -0,0 +1,18 @@
+# NEXUS Services package
+from services.cache import TTLCache
+from services.leaderboard import leaderboard_cache, stats_cache, compute_global_stats
+from services.rank_index import rank_index
+from services.score_history import record_score, get_score_history
+from services.analytics import analytics_writer, log_activity, log_failure, analytics_query, iter_analytics_ndjson, gzip_chunks
+from services.passwords import PasswordPoolBusy, hash_password, check_password, needs_rehash
+from services.flag_index import flag_index
+from services.challenges import challenge_registry
+from services.attempts import attempt_tracker, cooldown_remaining, record_failed_attempt
+from services.team_cache import get_team, put_team, invalidate_team
+from services.progress import stage_mask, stage_unlocked, advance_stage, reload_team
+from services.events import on_team_created, on_score_change
+from services.pagination import encode_cursor, decode_cursor, page_limit, parse_iso_time
+from services.http_cache import version_etag, version_tag, parse_version_tag, not_modified, with_etag
+from services.sqlite_pool import ReadOnlySQLitePool, SQLitePoolBusy, QueryBudgetExceeded, execute_limited
+from services.sqlite_sandbox import SQLiteSandboxes
+from services.static_payload import StaticPayload, static_json
@@ -0,0 +1,341 @@
+import atexit
+import queue
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from bson import json_util
+from pymongo import UpdateOne, WriteConcern
+from models import (
+    analytics_collection, analytics_hourly_collection,
+    activity_counters_collection, failure_windows_collection
+)
+from config import Config
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class AnalyticsWriter:
+    """
+    Batched, asynchronous writer for analytics events.
+
+    Request handlers only enqueue onto a bounded in-process queue; a
+    background thread flushes with insert_many once ANALYTICS_BATCH_SIZE
+    events are waiting or ANALYTICS_FLUSH_INTERVAL_SECONDS has passed.
+    When the queue is full, events are dropped and counted rather than
+    blocking the request. Pending events are drained at interpreter exit.
+
+    Each batch is also folded into per-team, per-activity-type, per-hour
+    counts, so reporting survives the raw events' TTL, and into exact
+    per-team totals by activity type.
+
+    Repeated failures go through record_failure() instead: only the first
+    few per team per window become raw events, and the rest are coalesced
+    in memory into one counter document per team per window.
+    """
+
+    def __init__(self, collection, hourly_collection, counters_collection, failures_collection,
+                 max_queue, batch_size, flush_interval):
+        self.collection = collection
+        self.hourly_collection = hourly_collection
+        self.counters_collection = counters_collection
+        self.failures_collection = failures_collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._failures = {}
+        self._failures_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def log(self, event):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def record_failure(self, event, sample):
+        """
+        Count a failure event for its team's current window. The first
+        FAILURE_RAW_PER_WINDOW per window are also logged as raw events;
+        up to FAILURE_SAMPLE_CAP distinct `sample` values are kept.
+        """
+        now = event["timestamp"]
+        window = Config.FAILURE_WINDOW_SECONDS
+        window_start = _EPOCH + timedelta(seconds=int((now - _EPOCH).total_seconds()) // window * window)
+        key = (event["team_name"], event["activity_type"], window_start)
+
+        with self._failures_lock:
+            state = self._failures.get(key)
+            if state is None:
+                state = self._failures[key] = {
+                    "count": 0, "pending": 0, "suppressed": 0,
+                    "samples": set(), "new_samples": [],
+                    "first_seen": now, "last_seen": now
+                }
+            state["count"] += 1
+            state["pending"] += 1
+            state["last_seen"] = now
+            if sample is not None and sample not in state["samples"] and len(state["samples"]) < Config.FAILURE_SAMPLE_CAP:
+                state["samples"].add(sample)
+                state["new_samples"].append(sample)
+            raw = state["count"] <= Config.FAILURE_RAW_PER_WINDOW
+            if not raw:
+                state["suppressed"] += 1
+
+        if raw:
+            self.log(event)
+        else:
+            self._ensure_started()
+
+    def flush(self):
+        """Write everything enqueued so far, blocking until it is stored."""
+        self._drain()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+        self._flush_failures()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+        self._drain()
+        self._flush_failures()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            self._flush_failures()
+
+    def _drain(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            rollup = _hourly_rollup(batch)
+            counters = _team_counters(batch)
+            self.collection.insert_many(batch, ordered=False)
+            self.hourly_collection.bulk_write(rollup, ordered=False)
+            self.counters_collection.bulk_write(counters, ordered=False)
+        except Exception as e:
+            print(f"⚠️ WARNING: Dropped {len(batch)} analytics events: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _flush_failures(self):
+        """Write coalesced failure counters, plus the counts of suppressed raw events."""
+        window = Config.FAILURE_WINDOW_SECONDS
+        now = datetime.utcnow()
+        with self._failures_lock:
+            pending = []
+            for key, state in list(self._failures.items()):
+                if state["pending"]:
+                    pending.append((key, dict(state)))
+                    state.update(pending=0, suppressed=0, new_samples=[])
+                # Closed windows no longer need their in-memory state
+                if (now - key[2]).total_seconds() > window:
+                    del self._failures[key]
+        if not pending:
+            return
+
+        failures, counters, hourly = _failure_updates(pending)
+        try:
+            self.failures_collection.bulk_write(failures, ordered=False)
+            if counters:
+                self.counters_collection.bulk_write(counters, ordered=False)
+                self.hourly_collection.bulk_write(hourly, ordered=False)
+        except Exception as e:
+            print(f"⚠️ WARNING: Dropped coalesced failure counters: {e}")
+
+
+def _hourly_rollup(batch):
+    counts = Counter(
+        (event["team_name"], event["activity_type"], event["timestamp"].replace(minute=0, second=0, microsecond=0))
+        for event in batch
+    )
+    return [
+        UpdateOne(
+            {"team_name": team_name, "activity_type": activity_type, "hour": hour},
+            {"$inc": {"count": count}},
+            upsert=True
+        )
+        for (team_name, activity_type, hour), count in counts.items()
+    ]
+
+
+def _team_counters(batch):
+    per_team = {}
+    for event in batch:
+        per_team.setdefault(event["team_name"], Counter())[event["activity_type"]] += 1
+    return [
+        UpdateOne(
+            {"team_name": team_name},
+            {"$inc": {
+                **{f"counts.{activity_type}": n for activity_type, n in counts.items()},
+                "total": sum(counts.values())
+            }},
+            upsert=True
+        )
+        for team_name, counts in per_team.items()
+    ]
+
+
+def _failure_updates(pending):
+    """
+    UpdateOnes for flushed failure windows: the window counters, plus team
+    counters and hourly rollups for raw events that were suppressed.
+    """
+    failures, counters, hourly = [], [], []
+    for (team_name, activity_type, window_start), state in pending:
+        update = {
+            "$inc": {"count": state["pending"], "suppressed": state["suppressed"]},
+            "$min": {"first_seen": state["first_seen"]},
+            "$max": {"last_seen": state["last_seen"]}
+        }
+        if state["new_samples"]:
+            update["$addToSet"] = {"samples": {"$each": state["new_samples"]}}
+        failures.append(UpdateOne(
+            {"team_name": team_name, "activity_type": activity_type, "window_start": window_start},
+            update,
+            upsert=True
+        ))
+        if state["suppressed"]:
+            # Suppressed events never reach the batch rollups, so count them here
+            counters.append(UpdateOne(
+                {"team_name": team_name},
+                {"$inc": {f"counts.{activity_type}": state["suppressed"], "total": state["suppressed"]}},
+                upsert=True
+            ))
+            hourly.append(UpdateOne(
+                {
+                    "team_name": team_name,
+                    "activity_type": activity_type,
+                    "hour": state["last_seen"].replace(minute=0, second=0, microsecond=0)
+                },
+                {"$inc": {"count": state["suppressed"]}},
+                upsert=True
+            ))
+    return failures, counters, hourly
+
+
+def _write_concern(value):
+    return WriteConcern(w=int(value) if value.isdigit() else value)
+
+
+analytics_writer = AnalyticsWriter(
+    analytics_collection.with_options(write_concern=_write_concern(Config.ANALYTICS_WRITE_CONCERN)),
+    analytics_hourly_collection.with_options(write_concern=_write_concern(Config.ANALYTICS_WRITE_CONCERN)),
+    activity_counters_collection.with_options(write_concern=_write_concern(Config.ANALYTICS_WRITE_CONCERN)),
+    failure_windows_collection.with_options(write_concern=_write_concern(Config.ANALYTICS_WRITE_CONCERN)),
+    max_queue=Config.ANALYTICS_QUEUE_SIZE,
+    batch_size=Config.ANALYTICS_BATCH_SIZE,
+    flush_interval=Config.ANALYTICS_FLUSH_INTERVAL_SECONDS
+)
+
+
+def log_activity(team_name, activity_type, details=None):
+    """Record an analytics event without waiting on MongoDB."""
+    analytics_writer.log({
+        "team_name": team_name,
+        "activity_type": activity_type,
+        "timestamp": datetime.utcnow(),
+        "details": details or {}
+    })
+
+
+def log_failure(team_name, activity_type, details=None, sample=None):
+    """
+    Record a repeatable failure (e.g. a wrong flag). Under brute force only
+    the first few per window are stored as raw events; the rest become
+    counters, with distinct `sample` values kept up to a cap.
+    """
+    analytics_writer.record_failure({
+        "team_name": team_name,
+        "activity_type": activity_type,
+        "timestamp": datetime.utcnow(),
+        "details": details or {}
+    }, sample)
+
+
+def analytics_query(team_name=None, activity_types=None, since=None, until=None):
+    """Filter for analytics exports."""
+    query = {}
+    if team_name:
+        query["team_name"] = team_name
+    if activity_types:
+        query["activity_type"] = {"$in": list(activity_types)}
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lt"] = until
+    return query
+
+
+def iter_analytics_ndjson(query, batch_size=None):
+    """
+    Yield analytics events as NDJSON lines (bytes) from a server-side cursor.
+
+    Documents are fetched `batch_size` at a time and never collected into a
+    list, so memory stays flat however many events are exported.
+    """
+    cursor = analytics_collection.find(
+        query,
+        batch_size=batch_size or Config.ANALYTICS_EXPORT_BATCH_SIZE
+    )
+    try:
+        for doc in cursor:
+            yield json_util.dumps(doc).encode("utf-8") + b"\n"
+    finally:
+        cursor.close()
+
+
+def gzip_chunks(chunks, level=6, flush_bytes=64 * 1024):
+    """Gzip-compress a stream of byte chunks, yielding compressed output as it fills."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= flush_bytes:
+            out = compressor.compress(b"".join(pending))
+            pending, pending_size = [], 0
+            if out:
+                yield out
+    yield compressor.compress(b"".join(pending)) + compressor.flush()
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from models import attempts_collection
+from config import Config
+
+# Failed attempts allowed per (team, avenger, stage) within the cooldown window
+STAGE_LIMITS = {
+    "flag": Config.MAX_ATTEMPTS_FLAG,
+    "question": Config.MAX_ATTEMPTS_QUESTION,
+    "advanced": Config.MAX_ATTEMPTS_FLAG,
+}
+
+
+class InMemoryAttemptTracker:
+    """
+    Sliding-window failure tracker for a single worker process.
+
+    Each key keeps at most `limit` timestamps, and the least recently used
+    keys are evicted beyond `max_keys`, so checks are O(1) and memory is
+    bounded.
+    """
+
+    def __init__(self, window_seconds, max_keys):
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures = OrderedDict()
+
+    def retry_after(self, key, limit):
+        """Seconds until `key` may try again, or 0 if it is not cooling down."""
+        with self._lock:
+            failures = self._failures.get(key)
+            if not failures or len(failures) < limit:
+                return 0
+            remaining = self.window - (time.time() - failures[0])
+            return int(remaining) + 1 if remaining > 0 else 0
+
+    def record_failure(self, key, limit):
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None or failures.maxlen != limit:
+                failures = self._failures[key] = deque(failures or (), maxlen=limit)
+            failures.append(time.time())
+            self._failures.move_to_end(key)
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+
+class MongoAttemptTracker:
+    """
+    Sliding-window failure tracker shared by every worker.
+
+    One document per key, addressed by _id, holding the last `limit`
+    failure times ($slice) and expiring through a TTL index once the
+    window has passed.
+    """
+
+    def __init__(self, window_seconds, collection):
+        self.window = window_seconds
+        self.collection = collection
+
+    def retry_after(self, key, limit):
+        doc = self.collection.find_one({"_id": _doc_id(key)}, {"failures": 1})
+        failures = doc.get("failures", []) if doc else []
+        if len(failures) < limit:
+            return 0
+        remaining = self.window - (datetime.utcnow() - failures[-limit]).total_seconds()
+        return int(remaining) + 1 if remaining > 0 else 0
+
+    def record_failure(self, key, limit):
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": _doc_id(key)},
+            {
+                "$push": {"failures": {"$each": [now], "$slice": -limit}},
+                "$set": {"expires_at": now + timedelta(seconds=self.window)}
+            },
+            upsert=True
+        )
+
+
+def _doc_id(key):
+    return "|".join(key)
+
+
+def _build_tracker():
+    window = Config.COOLDOWN_MINUTES * 60
+    if Config.ATTEMPT_TRACKER_BACKEND == "mongo":
+        return MongoAttemptTracker(window, attempts_collection)
+    return InMemoryAttemptTracker(window, Config.ATTEMPT_TRACKER_MAX_KEYS)
+
+
+attempt_tracker = _build_tracker()
+
+
+def cooldown_remaining(team_name, avenger, stage):
+    """Seconds a team must wait before its next `stage` attempt (0 = allowed)."""
+    return attempt_tracker.retry_after((team_name, avenger, stage), STAGE_LIMITS[stage])
+
+
+def record_failed_attempt(team_name, avenger, stage):
+    attempt_tracker.record_failure((team_name, avenger, stage), STAGE_LIMITS[stage])
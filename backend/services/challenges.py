@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import json
+import re
+from types import MappingProxyType
+from config import Config
+
+_JWT_FORMAT = re.compile(r"^[A-Za-z0-9\-_]+\.[A-Za-z0-9\-_]+\.[A-Za-z0-9\-_]+$")
+
+_CASE = {
+    None: lambda value: value,
+    "upper": str.upper,
+    "lower": str.lower,
+}
+
+
+def _exact(spec):
+    expected = spec["expected"]
+    return lambda value: value == expected
+
+
+def _normalized(spec):
+    strip = re.compile(spec.get("strip", r"[_\-\s]"))
+    expected = spec["expected"]
+    return lambda value: strip.sub("", value) == expected
+
+
+def _contains_any(spec):
+    needles = tuple(spec["needles"])
+    pad = spec.get("pad", False)
+
+    def check(value):
+        if pad:
+            value = f" {value} "
+        return any(needle in value for needle in needles)
+    return check
+
+
+def _regex(spec):
+    pattern = re.compile(spec["pattern"])
+    return lambda value: pattern.fullmatch(value) is not None
+
+
+def _jwt(spec):
+    expected = spec["expected"]
+    format_message = spec.get("format_message", spec["message"])
+
+    def check(value):
+        if not _JWT_FORMAT.match(value):
+            return format_message
+        return hmac.compare_digest(value, expected)
+    return check
+
+
+def _hash(spec):
+    expected = spec["sha256"].lower()
+
+    def check(value):
+        digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(digest, expected)
+    return check
+
+
+VALIDATORS = {
+    "exact": _exact,
+    "normalized": _normalized,
+    "contains_any": _contains_any,
+    "regex": _regex,
+    "jwt": _jwt,
+    "hash": _hash,
+}
+
+
+class Stage:
+    """A single compiled challenge step."""
+
+    __slots__ = ("case", "check", "message", "reveal")
+
+    def __init__(self, spec):
+        kind = spec["type"]
+        if kind not in VALIDATORS:
+            raise ValueError(f"Unknown validator type: {kind}")
+        self.case = _CASE[spec.get("case")]
+        self.check = VALIDATORS[kind](spec)
+        self.message = spec.get("message", "Incorrect. Try again.")
+        self.reveal = MappingProxyType(dict(spec.get("reveal", {})))
+
+    def validate(self, value):
+        """Return None when `value` passes, otherwise the failure message."""
+        result = self.check(self.case(value))
+        if result is True:
+            return None
+        return result or self.message
+
+
+class Track:
+    """
+    An ordered set of stages sharing analytics event names. Stages must be
+    solved in order, after every track listed in `requires`.
+    """
+
+    __slots__ = ("ok_event", "fail_event", "requires", "stages")
+
+    def __init__(self, avenger, name, spec):
+        prefix = f"{avenger}_{name}".upper()
+        self.ok_event = spec.get("ok_event", f"{prefix}_STAGE_OK")
+        self.fail_event = spec.get("fail_event", f"{prefix}_FAIL")
+        self.requires = tuple(spec.get("requires", ()))
+        self.stages = MappingProxyType({
+            int(number): Stage(stage) for number, stage in spec["stages"].items()
+        })
+
+
+class ChallengeRegistry:
+    """
+    Multi-stage challenges compiled from data once at startup.
+
+    Every avenger may declare named tracks of numbered stages and an
+    optional final flag. Validators (exact, normalized, contains_any,
+    regex, jwt, hash) are built once, so a request costs two dict lookups
+    and one compiled check.
+    """
+
+    def __init__(self, spec):
+        self._tracks = {}
+        self._final_flags = {}
+        for avenger, challenge in spec.items():
+            for name, track in challenge.get("tracks", {}).items():
+                self._tracks[(avenger, name)] = Track(avenger, name, track)
+            if "final_flag" in challenge:
+                self._final_flags[avenger] = Stage(challenge["final_flag"])
+
+    def track(self, avenger, name):
+        return self._tracks.get((avenger, name))
+
+    def complete_mask(self, avenger, name):
+        """
+        Progress bitmask of a fully solved track. Names without a track
+        (single-step checkpoints such as OSINT) count as one stage.
+        """
+        track = self._tracks.get((avenger, name))
+        if track is None:
+            return 1
+        return (1 << max(track.stages)) - 1
+
+    def final_flag(self, avenger):
+        return self._final_flags.get(avenger)
+
+
+def load_registry(path):
+    with open(path, encoding="utf-8") as fh:
+        return ChallengeRegistry(json.load(fh))
+
+
+challenge_registry = load_registry(Config.CHALLENGES_FILE)
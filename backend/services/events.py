@@ -0,0 +1,31 @@
+from services.leaderboard import leaderboard_cache, stats_cache
+from services.rank_index import rank_index
+from services.score_history import record_score
+from services.team_cache import invalidate_team, put_team
+
+
+def on_team_created(team):
+    """Hook for signups: the new team joins the rank index and total_teams."""
+    invalidate_team(team["team_name"])
+    rank_index.add(team)
+    leaderboard_cache.invalidate()
+    stats_cache.clear()
+
+
+def on_score_change(team, score_changed=True):
+    """
+    Hook for every write that can move a team on the leaderboard.
+
+    `team` is the post-update team document (without the password hash),
+    as returned by the award's find_one_and_update.
+    """
+    put_team(team)
+    rank_index.add(team)
+    leaderboard_cache.invalidate()
+    stats_cache.clear()
+
+    if score_changed:
+        try:
+            record_score(team["team_name"], team.get("score", 0))
+        except Exception as e:
+            print(f"⚠️ WARNING: Score history write failed: {e}")
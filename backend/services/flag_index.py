@@ -0,0 +1,80 @@
+import threading
+import time
+from types import MappingProxyType
+from models import game_flags_collection
+from config import Config
+
+_FIELDS = {"_id": 0, "avenger": 1, "flag_hash": 1, "stone": 1, "question": 1,
+           "answer_hash": 1, "points_flag": 1, "points_stone": 1, "version": 1}
+
+
+class FlagSnapshot:
+    """Immutable view of game_flags: flag hash -> challenge and avenger -> challenge."""
+
+    __slots__ = ("by_hash", "by_avenger", "signature")
+
+    def __init__(self, docs):
+        entries = [MappingProxyType(dict(doc)) for doc in docs]
+        self.by_hash = MappingProxyType({e["flag_hash"]: e for e in entries})
+        self.by_avenger = MappingProxyType({e["avenger"]: e for e in entries})
+        self.signature = _signature(entries)
+
+
+def _signature(docs):
+    return tuple(sorted((doc["avenger"], doc.get("version", 0)) for doc in docs))
+
+
+class FlagIndex:
+    """
+    In-process index of the (tiny) game_flags collection, so flag and answer
+    validation costs no database I/O.
+
+    A new snapshot is built and swapped in with a single reference assignment
+    on reload(): at startup, from the admin reload endpoint, or when the
+    per-document `version` fields change (checked at most every
+    FLAG_INDEX_CHECK_SECONDS). Anyone editing game_flags by hand should
+    `$inc` the document's version.
+    """
+
+    def __init__(self, check_seconds):
+        self.check_seconds = check_seconds
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def reload(self):
+        snapshot = FlagSnapshot(game_flags_collection.find({}, _FIELDS))
+        self._snapshot = snapshot
+        self._checked_at = time.monotonic()
+        return snapshot
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                return self._snapshot or self.reload()
+        if self.check_seconds and time.monotonic() - self._checked_at > self.check_seconds:
+            self._check_version()
+        return self._snapshot
+
+    def by_hash(self, flag_hash):
+        return self.snapshot().by_hash.get(flag_hash)
+
+    def by_avenger(self, avenger):
+        return self.snapshot().by_avenger.get(avenger)
+
+    def _check_version(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another request is already checking
+        try:
+            self._checked_at = time.monotonic()
+            current = _signature(game_flags_collection.find({}, {"_id": 0, "avenger": 1, "version": 1}))
+            if current != self._snapshot.signature:
+                self.reload()
+        except Exception as e:
+            print(f"⚠️ WARNING: Flag index version check failed: {e}")
+        finally:
+            self._lock.release()
+
+
+flag_index = FlagIndex(Config.FLAG_INDEX_CHECK_SECONDS)
@@ -0,0 +1,40 @@
+import secrets
+from flask import request, Response
+
+# Versions restart at 0 with the process, so tag them with the process too
+_INSTANCE = secrets.token_hex(4)
+
+
+def version_etag(*parts):
+    """Strong ETag value for a version counter (and any scoping parts)."""
+    return "-".join([_INSTANCE, *(str(part) for part in parts)])
+
+
+def version_tag(version):
+    """Public form of a version counter, e.g. an SSE id or ?since= value."""
+    return f"{_INSTANCE}-{version}"
+
+
+def parse_version_tag(tag):
+    """
+    The version counter inside `tag`, or None if it is malformed or was
+    issued by another process (whose counter means something else).
+    """
+    instance, _, version = (tag or "").rpartition("-")
+    if instance != _INSTANCE or not version.isdigit():
+        return None
+    return int(version)
+
+
+def not_modified(etag):
+    """A bodiless 304 if the request's If-None-Match already holds `etag`, else None."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,202 @@
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from models import teams_collection, RANK_SORT
+from config import Config
+from services.cache import TTLCache
+from services.http_cache import version_tag
+
+
+class MaterializedLeaderboard:
+    """
+    Top-N leaderboard kept as pre-serialized JSON bytes.
+
+    The body is rebuilt only when a score-changing write calls invalidate(),
+    and every rebuild is tagged with a monotonically increasing version.
+    Each rebuild publishes (version, body) as one immutable tuple, so readers
+    take no lock and never wait on a rebuild's MongoDB round-trips.
+
+    Each rebuild also records which rows changed rank or score since the
+    previous one, so streaming and polling clients can be sent deltas.
+    """
+
+    def __init__(self, size, history):
+        self.size = size
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._version = 0
+        self._published = None
+        self._rows = {}
+        self._total = 0
+        self._history = deque(maxlen=history)
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self):
+        """Return the current leaderboard body, building it on first use."""
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """Return (version, body) for the current leaderboard."""
+        published = self._published
+        if published is not None:
+            return published
+        with self._lock:
+            if self._published is None:
+                self._rebuild()
+            return self._published
+
+    def invalidate(self):
+        """Bump the version and rebuild the materialized body."""
+        with self._lock:
+            self._version += 1
+            try:
+                self._rebuild()
+            except Exception as e:
+                # Unpublish so the next reader retries the build
+                self._published = None
+                print(f"⚠️ WARNING: Leaderboard rebuild failed: {e}")
+            self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        """Block until the version moves past `version` or `timeout` expires."""
+        with self._lock:
+            self._changed.wait_for(lambda: self._version != version, timeout)
+            return self._version
+
+    def deltas_since(self, version):
+        """
+        Rows whose rank or score changed after `version`, plus teams that
+        dropped off the board, as (current version, payload). Returns None
+        when `version` is older than the retained history, in which case
+        the client needs a snapshot.
+        """
+        with self._lock:
+            if self._published is None:
+                self._rebuild()
+            if version == self._version:
+                touched = set()
+            elif version > self._version or not self._history or version < self._history[0][0] - 1:
+                return None
+            else:
+                touched = set()
+                for entry_version, names in self._history:
+                    if entry_version > version:
+                        touched.update(names)
+
+            changed = [row for name, row in self._rows.items() if name in touched]
+            changed.sort(key=lambda row: row["rank"])
+            return self._version, {
+                "version": version_tag(self._version),
+                "since": version_tag(version),
+                "changed": changed,
+                "removed": sorted(name for name in touched if name not in self._rows),
+                "total_teams": self._total
+            }
+
+    def _rebuild(self):
+        teams = _top_teams(self.size)
+        total = teams_collection.count_documents({})
+        payload = {
+            "leaderboard": teams,
+            "total_teams": total,
+            "version": version_tag(self._version),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+        rows = {team["team_name"]: team for team in teams}
+        touched = {
+            name for name, row in rows.items()
+            if name not in self._rows
+            or (self._rows[name]["rank"], self._rows[name].get("score")) != (row["rank"], row.get("score"))
+        }
+        touched.update(name for name in self._rows if name not in rows)
+        self._history.append((self._version, touched))
+        self._rows, self._total = rows, total
+        self._published = (self._version, body)
+
+
+def _top_teams(limit):
+    """Read the top teams in RANK_SORT order straight off the compound index."""
+    teams = list(teams_collection.find(
+        {},
+        {
+            "team_name": 1,
+            "score": 1,
+            "collected_stones": 1,
+            "solved_flags": 1,
+            "completed_avengers": 1,
+            "stones_count": 1,
+            "flags_count": 1,
+            "completed_count": 1,
+            "_id": 0
+        }
+    ).sort(RANK_SORT).limit(limit))
+
+    total_avengers = len(Config.AVENGERS)
+    for idx, team in enumerate(teams, start=1):
+        team["rank"] = idx
+        team["progress_percentage"] = round((team.get("completed_count", 0) / total_avengers) * 100, 1)
+
+    return teams
+
+
+leaderboard_cache = MaterializedLeaderboard(Config.LEADERBOARD_SIZE, Config.LEADERBOARD_DELTA_HISTORY)
+
+
+def compute_global_stats():
+    """
+    Global game statistics in a single $facet aggregation over the teams.
+
+    Stones and avengers come from Config.STONE_MAPPING, so counts for
+    unclaimed ones are reported as 0.
+    """
+    stones = list(Config.STONE_MAPPING.values())
+    avengers = list(Config.STONE_MAPPING.keys())
+
+    pipeline = [
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "total_teams": {"$sum": 1},
+                    "avg_score": {"$avg": "$score"},
+                    "perfect_teams": {
+                        "$sum": {"$cond": [{"$gte": ["$stones_count", len(stones)]}, 1, 0]}
+                    }
+                }}
+            ],
+            "stones": [
+                {"$unwind": "$collected_stones"},
+                {"$group": {"_id": "$collected_stones", "count": {"$sum": 1}}}
+            ],
+            "avengers": [
+                {"$unwind": "$completed_avengers"},
+                {"$group": {"_id": "$completed_avengers", "count": {"$sum": 1}}}
+            ]
+        }}
+    ]
+    result = next(teams_collection.aggregate(pipeline), {})
+
+    totals = (result.get("totals") or [{}])[0]
+    stone_counts = {row["_id"]: row["count"] for row in result.get("stones", [])}
+    avenger_counts = {row["_id"]: row["count"] for row in result.get("avengers", [])}
+    avg_score = totals.get("avg_score")
+
+    payload = {
+        "total_teams": totals.get("total_teams", 0),
+        "perfect_teams": totals.get("perfect_teams", 0),
+        "average_score": round(avg_score, 2) if avg_score is not None else 0,
+        "stone_collection_stats": {stone: stone_counts.get(stone, 0) for stone in stones},
+        "avenger_completion_stats": {avenger: avenger_counts.get(avenger, 0) for avenger in avengers},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+# Serialized /stats body keyed by leaderboard version, dropped by score-changing writes
+stats_cache = TTLCache(Config.LEADERBOARD_STATS_TTL_SECONDS, maxsize=8)
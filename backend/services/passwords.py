@@ -0,0 +1,92 @@
+import bcrypt
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+
+
+class PasswordPoolBusy(Exception):
+    """
+    Raised when the hashing pool already has BCRYPT_QUEUE_DEPTH jobs waiting,
+    a job times out, or the pool broke and is being rebuilt.
+    """
+
+
+_executor = None
+_executor_lock = threading.Lock()
+# Running + queued jobs; anything beyond this is rejected instead of queued
+_slots = threading.BoundedSemaphore(Config.BCRYPT_POOL_WORKERS + Config.BCRYPT_QUEUE_DEPTH)
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: forking a process that already runs Mongo/Flask threads is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.BCRYPT_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+
+def _discard(pool):
+    """Drop a broken pool so the next job starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is pool:
+            _executor = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    print("⚠️ WARNING: bcrypt worker pool broke, restarting it")
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    pool = _pool()
+    try:
+        future = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        _slots.release()
+        _discard(pool)
+        raise PasswordPoolBusy()
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=Config.BCRYPT_TIMEOUT_SECONDS)
+    except TimeoutError:
+        raise PasswordPoolBusy()
+    except BrokenProcessPool:
+        # A worker died (OOM, kill); fail this request, rebuild for the next
+        _discard(pool)
+        raise PasswordPoolBusy()
+
+
+def hash_password(password):
+    """Hash a plaintext password with the configured bcrypt cost, off the request thread."""
+    return _run(_hashpw, password.encode("utf-8"), Config.BCRYPT_ROUNDS)
+
+
+def check_password(password, hashed):
+    """Verify a plaintext password against a bcrypt hash, off the request thread."""
+    return _run(_checkpw, password.encode("utf-8"), bytes(hashed))
+
+
+def needs_rehash(hashed):
+    """True if the hash was made with a lower cost factor than BCRYPT_ROUNDS."""
+    try:
+        return int(bytes(hashed).split(b"$")[2]) < Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
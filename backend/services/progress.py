@@ -0,0 +1,69 @@
+from models import teams_collection
+from pymongo import ReturnDocument
+from services.challenges import challenge_registry
+from services.team_cache import put_team
+
+# Per-team stage progress lives on the team document as one bitmask per
+# track, e.g. {"stage_progress": {"hulk": {"logic": 0b0011, "osint": 1}}},
+# where bit n-1 is set once stage n has been solved.
+
+
+def stage_mask(team, avenger, track):
+    return team.get("stage_progress", {}).get(avenger, {}).get(track, 0)
+
+
+def stage_unlocked(team, avenger, track, stage):
+    """
+    True when every earlier stage of `track` and every track it requires
+    is solved, judged from `team` alone (no database reads).
+    """
+    mask = stage_mask(team, avenger, track)
+    earlier = (1 << (stage - 1)) - 1
+    if mask & earlier != earlier:
+        return False
+
+    definition = challenge_registry.track(avenger, track)
+    for required in (definition.requires if definition else ()):
+        complete = challenge_registry.complete_mask(avenger, required)
+        if stage_mask(team, avenger, required) & complete != complete:
+            return False
+    return True
+
+
+def advance_stage(team, avenger, track, stage):
+    """
+    Mark `stage` solved with a compare-and-set on the track's bitmask and
+    return the updated team document (also written to the team cache).
+    Already-solved stages are a no-op that returns `team` unchanged.
+    """
+    field = f"stage_progress.{avenger}.{track}"
+    bit = 1 << (stage - 1)
+
+    for _ in range(3):
+        current = stage_mask(team, avenger, track)
+        if current & bit:
+            return team
+
+        updated = teams_collection.find_one_and_update(
+            {"team_name": team["team_name"], field: current if current else {"$in": [0, None]}},
+            {"$set": {field: current | bit}},
+            projection={"password_hash": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if updated:
+            put_team(updated)
+            return updated
+
+        # Another request moved the mask first: re-read and retry
+        team = reload_team(team["team_name"])
+        if not team:
+            return None
+    return None
+
+
+def reload_team(team_name):
+    """Fresh team document from MongoDB, refreshing the team cache."""
+    team = teams_collection.find_one({"team_name": team_name}, {"password_hash": 0})
+    if team:
+        put_team(team)
+    return team
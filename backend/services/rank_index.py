@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+from datetime import datetime
+from models import teams_collection, RANK_FIELDS
+from config import Config
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        # width[i] = number of bottom-level hops from this node to next[i]
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    """
+    Sorted set of unique keys with O(log n) insert, remove, rank and
+    positional lookup (an order-statistic skip list).
+    """
+
+    MAX_LEVEL = 24
+
+    def __init__(self):
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _predecessors(self, key):
+        chain = [None] * self.MAX_LEVEL
+        steps = [0] * self.MAX_LEVEL
+        node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps_at_level = self._predecessors(key)
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+
+        new = _Node(key, level)
+        steps = 0
+        for i in range(level):
+            prev = chain[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            new.width[i] = prev.width[i] - steps
+            prev.width[i] = steps + 1
+            steps += steps_at_level[i]
+        for i in range(level, self.MAX_LEVEL):
+            chain[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for i in range(len(target.next)):
+            prev = chain[i]
+            prev.width[i] += target.width[i] - 1
+            prev.next[i] = target.next[i]
+        for i in range(len(target.next), self.MAX_LEVEL):
+            chain[i].width[i] -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """1-based position of `key`, or None if absent."""
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is None or target.key != key:
+            return None
+        return position + 1
+
+    def slice(self, start, stop):
+        """Keys at 1-based positions start..stop inclusive."""
+        start = max(start, 1)
+        stop = min(stop, self._size)
+        if start > stop:
+            return []
+
+        node = self._head
+        remaining = start
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        keys = []
+        for _ in range(stop - start + 1):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+def rank_key(team):
+    """Skip list key in leaderboard order (see models.ranking.RANK_SORT)."""
+    return (
+        -team.get("score", 0),
+        -team.get("stones_count", 0),
+        -team.get("flags_count", 0),
+        team.get("created_at") or datetime.max,
+        team["team_name"]
+    )
+
+
+def _key_to_row(key, rank):
+    return {
+        "rank": rank,
+        "team_name": key[4],
+        "score": -key[0],
+        "stones_count": -key[1],
+        "flags_count": -key[2]
+    }
+
+
+class RankIndex:
+    """
+    In-process rank index over every team.
+
+    Built once from teams_collection and then updated incrementally with the
+    post-update documents of the score mutations in routes/game.py, so rank lookups, neighbourhood
+    windows and total counts never touch the database. Each worker process
+    keeps its own copy, so it is also rebuilt every RANK_INDEX_REFRESH_SECONDS
+    to pick up writes made by other workers.
+    """
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._list = None
+        self._keys = {}
+        self._built_at = 0.0
+
+    def _ensure_built(self):
+        stale = self.refresh_seconds and time.monotonic() - self._built_at > self.refresh_seconds
+        if self._list is not None and not stale:
+            return
+
+        skiplist = IndexableSkipList()
+        keys = {}
+        for team in teams_collection.find({}, {f: 1 for f in RANK_FIELDS}):
+            key = rank_key(team)
+            skiplist.insert(key)
+            keys[team["team_name"]] = key
+        self._list, self._keys = skiplist, keys
+        self._built_at = time.monotonic()
+
+    def rank(self, team_name):
+        with self._lock:
+            self._ensure_built()
+            key = self._keys.get(team_name)
+            return self._list.rank(key) if key else None
+
+    def total(self):
+        with self._lock:
+            self._ensure_built()
+            return len(self._list)
+
+    def around(self, team_name, radius):
+        """Rows ranked within `radius` places of `team_name`, or None."""
+        with self._lock:
+            self._ensure_built()
+            key = self._keys.get(team_name)
+            if not key:
+                return None
+            rank = self._list.rank(key)
+            start = max(rank - radius, 1)
+            keys = self._list.slice(start, rank + radius)
+            return [_key_to_row(k, start + i) for i, k in enumerate(keys)]
+
+    def add(self, team):
+        """Insert or replace a team from its document."""
+        key = rank_key(team)
+        with self._lock:
+            if self._list is None:
+                return
+            old = self._keys.get(team["team_name"])
+            if old:
+                # Counters only grow, so a document behind the indexed one is
+                # a concurrent award arriving out of order
+                if key[0] > old[0] or key[1] > old[1] or key[2] > old[2]:
+                    return
+                self._list.remove(old)
+            self._list.insert(key)
+            self._keys[team["team_name"]] = key
+
+    def top(self, n):
+        """The first `n` rows in ranking order."""
+        with self._lock:
+            self._ensure_built()
+            return [_key_to_row(k, i) for i, k in enumerate(self._list.slice(1, n), start=1)]
+
+
+rank_index = RankIndex(Config.RANK_INDEX_REFRESH_SECONDS)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from models import score_history_collection
+from config import Config
+
+
+def _bucket_start(ts):
+    window = Config.SCORE_HISTORY_BUCKET_MINUTES
+    minute = (ts.hour * 60 + ts.minute) // window * window
+    return ts.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+
+
+def record_score(team_name, score, at=None):
+    """Append a (time, score) point to the team's bucket for the current window."""
+    at = at or datetime.utcnow()
+    score_history_collection.update_one(
+        {"team_name": team_name, "bucket_start": _bucket_start(at)},
+        {
+            "$push": {"points": {"t": at, "score": score}},
+            "$inc": {"count": 1},
+            "$set": {"last_score": score}
+        },
+        upsert=True
+    )
+
+
+def get_score_history(team_name):
+    """
+    A team's score progression as [{"t": iso, "score": n}, ...].
+
+    One indexed read over the team's buckets in time order.
+    """
+    points = []
+    buckets = score_history_collection.find({"team_name": team_name}, {"points": 1, "_id": 0}).sort("bucket_start", 1)
+    for bucket in buckets:
+        for point in bucket.get("points", []):
+            points.append({"t": point["t"].isoformat(), "score": point["score"]})
+    return points
@@ -0,0 +1,163 @@
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+_memory_names = itertools.count(1)
+
+# VM instructions between progress-handler callbacks
+_PROGRESS_INTERVAL = 1000
+
+
+class SQLitePoolBusy(Exception):
+    """Every pooled connection stayed checked out for the whole timeout."""
+
+
+class QueryBudgetExceeded(Exception):
+    """A query was aborted for running past one of its execution limits."""
+
+
+class ReadOnlySQLitePool:
+    """
+    Fixed-size pool of read-only connections to one SQLite database.
+
+    mode="immutable" opens the file through a `mode=ro&immutable=1` URI,
+    so SQLite skips locking and change detection entirely. mode="memory"
+    copies the file once into a shared-cache in-memory database (kept alive
+    by an anchor connection) and every pooled connection reads from RAM.
+
+    Connections are created lazily up to `size` and reused in LIFO order,
+    so a warm connection with a populated page cache is handed out first.
+    """
+
+    def __init__(self, path, mode="immutable", size=8, mmap_bytes=0, cache_kib=2048, timeout=5.0):
+        self.path = os.path.abspath(path)
+        self.mode = mode
+        self.size = size
+        self.mmap_bytes = mmap_bytes
+        self.cache_kib = cache_kib
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._anchor = None
+
+        if mode == "memory":
+            self._uri = f"file:nexus-sqlite-{next(_memory_names)}?mode=memory&cache=shared"
+            self._anchor = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            source = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                source.backup(self._anchor)
+            finally:
+                source.close()
+        elif mode == "immutable":
+            self._uri = f"file:{self.path}?mode=ro&immutable=1"
+        else:
+            raise ValueError(f"Unknown SQLite pool mode: {mode}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_kib)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise SQLitePoolBusy("No SQLite connection available")
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of the `with` block."""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+
+def execute_limited(conn, sql, params=(), max_steps=None, max_seconds=None, max_rows=None, max_bytes=None):
+    """
+    Run `sql` on `conn` and fetch its rows under an execution budget.
+
+    A progress handler aborts the statement once it has run `max_steps`
+    VM instructions or `max_seconds` of wall time. SQLITE_LIMIT_LENGTH
+    stops any single string or blob from growing past `max_bytes`, and
+    fetching stops after `max_rows` rows or `max_bytes` of row data.
+    Raises QueryBudgetExceeded naming the limit that was hit.
+    """
+    state = {"steps": 0, "reason": None}
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+
+    def progress():
+        state["steps"] += _PROGRESS_INTERVAL
+        if max_steps and state["steps"] > max_steps:
+            state["reason"] = "Query exceeded its step budget"
+            return 1
+        if deadline and time.monotonic() > deadline:
+            state["reason"] = "Query exceeded its time budget"
+            return 1
+        return 0
+
+    conn.set_progress_handler(progress, _PROGRESS_INTERVAL)
+    old_length = conn.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, max_bytes) if max_bytes else None
+    cursor = None
+    try:
+        cursor = conn.execute(sql, params)
+        rows, size = [], 0
+        while True:
+            batch = cursor.fetchmany(64)
+            if not batch:
+                return rows
+            for row in batch:
+                rows.append(row)
+                size += sum(_value_size(value) for value in row)
+                if max_rows and len(rows) > max_rows:
+                    raise QueryBudgetExceeded("Query returned too many rows")
+                if max_bytes and size > max_bytes:
+                    raise QueryBudgetExceeded("Query result is too large")
+    except sqlite3.OperationalError as e:
+        if state["reason"]:
+            raise QueryBudgetExceeded(state["reason"]) from e
+        raise
+    except sqlite3.DataError as e:
+        if max_bytes:
+            raise QueryBudgetExceeded("Query result is too large") from e
+        raise
+    finally:
+        if cursor is not None:
+            cursor.close()
+        conn.set_progress_handler(None, 0)
+        if old_length is not None:
+            conn.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, old_length)
+
+
+def _value_size(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
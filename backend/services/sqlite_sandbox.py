@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class _Sandbox:
+    __slots__ = ("conn", "lock", "size", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.size = 0
+        self.last_used = time.monotonic()
+
+
+class SQLiteSandboxes:
+    """
+    Private in-memory copies of a pristine database, one per key (team).
+
+    A sandbox is cloned from `source` (a ReadOnlySQLitePool) with the
+    SQLite backup API on first use, so one team's heavy or destructive
+    queries never touch anyone else's data. Sandboxes live in an LRU
+    bounded by `max_count` and by `max_bytes` of total database size, and
+    are dropped after `idle_seconds` without use. reset() discards a
+    sandbox; the next query clones a fresh one.
+    """
+
+    def __init__(self, source, max_count, max_bytes, idle_seconds):
+        self.source = source
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sandboxes = OrderedDict()
+        self._bytes = 0
+
+    @contextmanager
+    def connection(self, key):
+        """Borrow `key`'s sandbox connection; queries per sandbox run one at a time."""
+        sandbox = self._get(key)
+        with sandbox.lock:
+            try:
+                yield sandbox.conn
+            finally:
+                if sandbox.conn.in_transaction:
+                    sandbox.conn.rollback()
+                size = _database_size(sandbox.conn)
+        with self._lock:
+            if self._sandboxes.get(key) is sandbox:
+                self._bytes += size - sandbox.size
+                sandbox.size = size
+            self._evict(keep=key)
+
+    def reset(self, key):
+        with self._lock:
+            sandbox = self._sandboxes.pop(key, None)
+            if sandbox:
+                self._bytes -= sandbox.size
+        return sandbox is not None
+
+    def stats(self):
+        with self._lock:
+            return {"sandboxes": len(self._sandboxes), "bytes": self._bytes}
+
+    def _get(self, key):
+        with self._lock:
+            sandbox = self._sandboxes.get(key)
+            if sandbox:
+                sandbox.last_used = time.monotonic()
+                self._sandboxes.move_to_end(key)
+                return sandbox
+
+        # Clone outside the registry lock so other teams aren't held up
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with self.source.connection() as pristine:
+            pristine.backup(conn)
+        fresh = _Sandbox(conn)
+        fresh.size = _database_size(conn)
+
+        with self._lock:
+            sandbox = self._sandboxes.get(key)
+            if sandbox:
+                # Another request for the same key won the race
+                self._sandboxes.move_to_end(key)
+            else:
+                sandbox = self._sandboxes[key] = fresh
+                self._bytes += fresh.size
+            sandbox.last_used = time.monotonic()
+            self._evict(keep=key)
+            return sandbox
+
+    def _evict(self, keep):
+        """Drop idle sandboxes, then least recently used ones over the caps."""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sandboxes:
+            key, sandbox = next(iter(self._sandboxes.items()))
+            if key == keep:
+                break
+            over = len(self._sandboxes) > self.max_count or self._bytes > self.max_bytes
+            if not over and sandbox.last_used >= cutoff:
+                break
+            del self._sandboxes[key]
+            self._bytes -= sandbox.size
+
+
+def _database_size(conn):
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+import json
+from flask import request, Response
+from services.http_cache import not_modified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class StaticPayload:
+    """
+    A response body that never changes for the life of the process.
+
+    The body is encoded once at construction: identity, gzip and, when the
+    `brotli` package is installed, br. Each variant carries a strong ETag
+    derived from the content, and response() picks the variant the client
+    accepts (by Accept-Encoding quality) and answers If-None-Match with 304.
+    """
+
+    def __init__(self, body, mimetype):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.mimetype = mimetype
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        self._variants = {"identity": (body, digest)}
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                self._variants[encoding] = (data, f"{digest}-{encoding}")
+
+    def _negotiate(self):
+        accepted = request.accept_encodings
+        best, best_quality = "identity", 0
+        # Prefer br over gzip when the client rates them equally
+        for encoding in ("br", "gzip"):
+            if encoding in self._variants:
+                quality = accepted[encoding]
+                if quality > best_quality:
+                    best, best_quality = encoding, quality
+        return best
+
+    def response(self):
+        encoding = self._negotiate()
+        body, etag = self._variants[encoding]
+
+        cached = not_modified(etag)
+        if cached is not None:
+            cached.vary.add("Accept-Encoding")
+            return cached
+
+        response = Response(body, mimetype=self.mimetype)
+        if encoding != "identity":
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(etag)
+        return response
+
+
+def static_json(payload):
+    """StaticPayload for a JSON document built once at startup."""
+    return StaticPayload(json.dumps(payload, separators=(",", ":")), "application/json")
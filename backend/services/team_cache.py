@@ -0,0 +1,31 @@
+from models import teams_collection
+from config import Config
+from services.cache import TTLCache
+
+# Per-process LRU of team documents for strong_auth_required. Writes to a
+# team invalidate its entry; TEAM_CACHE_TTL_SECONDS bounds how long bans or
+# deletions made elsewhere (other workers, the shell) can go unnoticed.
+_cache = TTLCache(Config.TEAM_CACHE_TTL_SECONDS, maxsize=Config.TEAM_CACHE_MAX_ENTRIES)
+
+
+def get_team(team_name):
+    """
+    Team document without its password hash, served from the cache when
+    possible. The returned dict is shared between requests: treat it as
+    read-only.
+    """
+    team = _cache.get(team_name)
+    if team is None:
+        team = teams_collection.find_one({"team_name": team_name}, {"password_hash": 0})
+        if team is not None:
+            _cache.set(team_name, team)
+    return team
+
+
+def put_team(team):
+    """Write-through: cache the post-update document returned by a team write."""
+    _cache.set(team["team_name"], team)
+
+
+def invalidate_team(team_name):
+    _cache.invalidate(team_name)